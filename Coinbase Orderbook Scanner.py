@@ -1,85 +1,225 @@
+import io
 import os
+import sys
+import atexit
+import csv
 import time
-import json
+import logging
+import orjson
 import requests
 import datetime
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Get script directory for relative file paths
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_DIR = Path(__file__).absolute().parent
 
 # Configuration 
 CONFIG = {
     "PAIRS_FILE": "active_pairs_no_usd.txt",            # Default pairs file
     "PRODUCTS_FILE": "products.json",                   # File to store product information
     "SPREAD_PAIRS_FILE": "active_spread_pairs.json",    # File to store active spread pairs
+    "VOLUME_CACHE_FILE": "volume_cache.json",           # File to store the last known USD volume of each pair
+    "SCAN_RESULTS_FILE": None,                          # CSV file to append every scan result to for analysis, None to disable
     "DEFAULT_PRECISION": 8,                             # Default decimal precision for price display when quote_increment is not available
     "PRODUCTS_MAX_AGE": 4,                              # Maximum age of products file in hours before refresh
     "RATE_LIMIT_DELAY": 1,                              # Delay in seconds between retry attempts
     "RATE_LIMIT_TRY_ATTEMPT": 5,                        # Number of retry attempts for rate limited requests
+    "RATE_LIMIT_PER_SECOND": 3,                         # Sustained number of API requests allowed per second
+    "RATE_LIMIT_BURST": 6,                              # Number of API requests allowed in a burst
+    "REQUEST_TIMEOUT": 10,                              # Timeout in seconds for each API request
+    "SCAN_WORKERS": 4,                                  # Number of API requests made concurrently during a scan
+    "VOLUME_CACHE_TTL": 60,                             # Seconds to reuse fetched 24hr volume data before fetching it again
+    "VOLUME_CACHE_MAX_AGE": 24,                         # Maximum age in hours of a cached volume used to skip low volume pairs
     "DEBUG": False,                                     # If True, will show additional debug information
     "SHOW_SCAN_RESULTS": False,                         # If False, only show spread alerts, not all scan results
     "SHOW_BELOW_THRESHOLD": False,                      # If True, shows pairs below volume threshold when SHOW_SCAN_RESULTS is True
     "SHOW_LOADED_PAIR_INFO": False,                     # If True, shows detailed information about loaded pairs
     "SHOW_TIMESTAMP": False,                            # If False, timestamps will not be displayed in logs
+    "LOG_BUFFER_SIZE": 65536,                           # Bytes of log output buffered before writing, logs are also flushed after every scan
     "ORDERBOOK_VALUE": 50000,                           # Will scan total orderbooks needed for 1 million dollars in total value
+    "ORDERBOOK_LEVEL": 2,                               # Orderbook level to fetch, 1 only returns the best bid and ask so spreads ignore ORDERBOOK_VALUE
     "MIN_24HR_VOLUME": 0,                               # Minimum 24hr volume in USD
     "SPREAD_ALERT": 5,                                  # Alert when spread is above this value
-    "SCAN_BOOKS_WAIT": 300,                             # Seconds to wait between scans
-    "SCAN_ACTIVE_SPREADS_PAIRS_WAIT": 15,               # Seconds to wait between active spread pairs scans
+    "SCAN_BOOKS_WAIT": 300,                             # Seconds between the starts of full scans, the scan time is not added on top
+    "SCAN_ACTIVE_SPREADS_PAIRS_WAIT": 15,               # Seconds between the starts of active spread pairs scans
     "ACTIVE_SCAN_CYCLES": 3,                            # Number of active spread pair scan cycles before doing a full scan
     "SCAN_ONCE": True                                   # If True, only perform one full scan and exit
 }
 
-# Handle paths - make them absolute if they aren't already
-for file_key in ["PAIRS_FILE", "PRODUCTS_FILE", "SPREAD_PAIRS_FILE"]:
-    if not os.path.isabs(CONFIG[file_key]):
-        # Make it relative to the script directory
-        CONFIG[file_key] = os.path.join(SCRIPT_DIR, CONFIG[file_key])
+# Handle paths - convert them to absolute Paths once, relative paths are relative to the script directory
+for file_key in ["PAIRS_FILE", "PRODUCTS_FILE", "SPREAD_PAIRS_FILE", "VOLUME_CACHE_FILE", "SCAN_RESULTS_FILE"]:
+    if CONFIG[file_key]:
+        CONFIG[file_key] = SCRIPT_DIR / CONFIG[file_key]
 
-# Function to get formatted timestamp for logging
-def get_timestamp():
-    if CONFIG["SHOW_TIMESTAMP"]:
-        return f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
-    return ""
+# Shared HTTP session so repeated requests to the API reuse keep-alive connections, with one pooled
+# connection per scan worker. Failed connections and connections dropped by the server (e.g. a stale
+# keep-alive connection) are retried right away, which is safe for these GET requests. Every response
+# (including a 429 and its Retry-After header) is returned to make_api_request, which handles it
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=CONFIG["SCAN_WORKERS"],
+    max_retries=Retry(
+        total=3, status=0, backoff_factor=0.1,
+        respect_retry_after_header=False, raise_on_status=False
+    )
+))
+SESSION.headers.update({
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",  # Level 2 orderbooks are large, compress them in transit
+    "Connection": "keep-alive",
+    "User-Agent": "cb-scanner/1"
+})
+
+# Token bucket shared by all API requests to stay within the public rate limit
+class TokenBucket:
+    """Thread-safe token bucket that allows `rate` requests per second with bursts of up to `burst`"""
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last_time = time.monotonic()
+        self.next_time = 0  # No requests are allowed before this time, set when rate limited
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request is allowed and take a token for it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last_time) * self.rate)
+                self.last_time = now
+                if now >= self.next_time and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.next_time - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back all requests for the given number of seconds"""
+        with self.lock:
+            self.next_time = max(self.next_time, time.monotonic() + seconds)
+
+BUCKET = TokenBucket(CONFIG["RATE_LIMIT_PER_SECOND"], CONFIG["RATE_LIMIT_BURST"])
+
+# Format of the timestamp prefix added to log messages
+TIMESTAMP_FORMAT = "[%Y-%m-%d %H:%M:%S] "
+
+# Buffered console stream, so a scan's log lines are written in a few large writes instead of one per line
+try:
+    LOG_STREAM = io.TextIOWrapper(
+        io.BufferedWriter(io.FileIO(sys.stdout.fileno(), "w", closefd=False), CONFIG["LOG_BUFFER_SIZE"]),
+        encoding=sys.stdout.encoding, errors="replace"
+    )
+except (AttributeError, OSError, ValueError):
+    LOG_STREAM = sys.stdout  # stdout is not backed by a file descriptor, write to it directly
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """Stream handler that leaves flushing to flush_logs() instead of flushing after every record"""
+    def flush(self):
+        pass
+
+class SecondCachedFormatter(logging.Formatter):
+    """Formatter that formats the timestamp once per second and reuses it for every record in that second"""
+    def __init__(self, fmt=None, datefmt=None):
+        super().__init__(fmt, datefmt)
+        self.cached_second = None
+        self.cached_time = ""
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self.cached_second:
+            self.cached_time = super().formatTime(record, datefmt)
+            self.cached_second = second
+        return self.cached_time
+
+# Console logger, the timestamp prefix is added by the formatter when SHOW_TIMESTAMP is enabled
+LOGGER = logging.getLogger("scanner")
+LOG_HANDLER = BufferedStreamHandler(LOG_STREAM)
+LOG_HANDLER.setFormatter(SecondCachedFormatter(
+    "%(asctime)s%(message)s" if CONFIG["SHOW_TIMESTAMP"] else "%(message)s",
+    TIMESTAMP_FORMAT
+))
+LOGGER.handlers = [LOG_HANDLER]
+LOGGER.setLevel(logging.INFO)
+LOGGER.propagate = False
 
 # Helper function for logging with timestamp
 def log(message):
     """Log a message with timestamp if configured"""
-    print(f"{get_timestamp()}{message}")
+    LOGGER.info(message)
+
+# Write out any buffered log output
+def flush_logs():
+    """Flush buffered log output to the console"""
+    with LOG_HANDLER.lock:
+        LOG_STREAM.flush()
+
+atexit.register(flush_logs)
+
+# Delay before retrying a rate limited request
+def get_retry_delay(response, attempt):
+    """Use the Retry-After header if the API sent one, otherwise back off exponentially"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+    return CONFIG["RATE_LIMIT_DELAY"] * 2 ** attempt
 
 # Generic API request function to reduce duplication
 def make_api_request(url, resource_name="resource"):
     """Make a rate-limited API request to Coinbase"""
     for attempt in range(CONFIG["RATE_LIMIT_TRY_ATTEMPT"]):
         try:
-            response = requests.get(url)
+            BUCKET.acquire()
+            response = SESSION.get(url, timeout=CONFIG["REQUEST_TIMEOUT"])
             
             if response.status_code == 200:
-                return response.json()
+                return orjson.loads(response.content)
                 
+            # Release the connection back to the pool before retrying or giving up
+            response.close()
+            
             if response.status_code == 429:  # Rate limited
-                if attempt < CONFIG["RATE_LIMIT_TRY_ATTEMPT"] - 1:  # Don't sleep on last attempt
-                    time.sleep(CONFIG["RATE_LIMIT_DELAY"])
+                if attempt < CONFIG["RATE_LIMIT_TRY_ATTEMPT"] - 1:  # Don't wait on last attempt
+                    BUCKET.pause(get_retry_delay(response, attempt))
                     continue
             
-            log(f"Error fetching {resource_name}: {response.status_code} {response.text}")
+            # Only log the start of the error body, it can be large for orderbook requests
+            log(f"Error fetching {resource_name}: {response.status_code} {response.content[:512].decode('utf-8', 'replace')}")
             return None
             
         except Exception as e:
             log(f"Exception fetching {resource_name} (attempt {attempt + 1}): {e}")
             if attempt == CONFIG["RATE_LIMIT_TRY_ATTEMPT"] - 1:
                 return None
-            time.sleep(CONFIG["RATE_LIMIT_DELAY"])
+            time.sleep(CONFIG["RATE_LIMIT_DELAY"] * 2 ** attempt)
     
     return None
 
-# Format number with specified decimal precision
-def format_with_precision(num, decimals):
-    """Format number with specified decimal precision"""
-    return f"{num:.{decimals}f}"
+# Formatters by decimal precision, each format spec is only built once
+FORMAT_CACHE = {}
+
+def get_precision_formatter(decimals):
+    """Get a function that formats a number with the specified decimal precision"""
+    formatter = FORMAT_CACHE.get(decimals)
+    if formatter is None:
+        formatter = FORMAT_CACHE[decimals] = ("{:." + str(decimals) + "f}").format
+    return formatter
 
-def get_orderbook(product_id, level=2):
-    """Fetch the orderbook for a given product using public API with rate limiting"""
+def get_orderbook(product_id, level=None):
+    """Fetch the orderbook for a given product using public API with rate limiting
+       Uses the ORDERBOOK_LEVEL setting unless a level is given"""
+    if level is None:
+        level = CONFIG["ORDERBOOK_LEVEL"]
     url = f"https://api.exchange.coinbase.com/products/{product_id}/book?level={level}"
     return make_api_request(url, f"orderbook for {product_id}")
 
@@ -91,7 +231,7 @@ def get_product_volume(product_id):
     
     # Debug the response structure if requested
     if data and CONFIG["DEBUG"]:
-        log(f"Volume data for {product_id}: {json.dumps(data, indent=2)}")
+        log(f"Volume data for {product_id}: {orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()}")
     
     if not data:
         log(f"Warning: Failed to get volume data for {product_id}")
@@ -128,6 +268,85 @@ def get_product_volume(product_id):
     return data
 
 
+# Volume data by product id as (fetch time, data), 24hr stats change slowly so they are reused for a short while
+_VOLUME_CACHE = {}
+
+def get_cached_product_volume(product_id):
+    """Get the 24-hour volume data for a product, reusing data fetched within the last VOLUME_CACHE_TTL seconds"""
+    now = time.monotonic()
+    cached = _VOLUME_CACHE.get(product_id)
+    if cached and now - cached[0] < CONFIG["VOLUME_CACHE_TTL"]:
+        return cached[1]
+    
+    data = get_product_volume(product_id)
+    if data:
+        _VOLUME_CACHE[product_id] = (now, data)
+    return data
+
+
+def get_usd_volume(volume_data, product_id):
+    """Calculate the 24-hour USD volume of a product as volume * last price
+       Returns None if the volume or price data is missing"""
+    # Extract volume data
+    if 'volume_24h' in volume_data:
+        spot_volume = float(volume_data['volume_24h'])
+    elif 'volume' in volume_data:
+        spot_volume = float(volume_data['volume'])
+    elif 'spot_volume_24h' in volume_data:
+        spot_volume = float(volume_data['spot_volume_24h'])
+    else:
+        log(f"Could not find volume data in response for {product_id}")
+        return None
+    
+    # Extract price data
+    if 'last' in volume_data:
+        last_price = float(volume_data['last'])
+    else:
+        log(f"Could not find price data in response for {product_id}")
+        return None
+    
+    return spot_volume * last_price
+
+
+def fetch_pair_volume(trading_pair):
+    """Fetch the volume data for a trading pair and calculate its USD volume
+       Returns a tuple of (volume_data, usd_volume)"""
+    volume_data = get_cached_product_volume(trading_pair)
+    if not volume_data:
+        return (None, None)
+    return (volume_data, get_usd_volume(volume_data, trading_pair))
+
+
+def fetch_orderbook_range(trading_pair, target_value):
+    """Fetch the orderbook for a trading pair and calculate its price range after absorbing target_value
+       Returns None if the orderbook could not be fetched or its range calculated"""
+    orderbook = get_orderbook(trading_pair)
+    if not orderbook:
+        if CONFIG["DEBUG"]:
+            log(f"Warning: Failed to get orderbook for {trading_pair}")
+        return None
+    
+    # Reduce the orderbook to its price range here so full books are not held until the scan completes
+    orderbook_range = calculate_orderbook_range(orderbook, target_value)
+    if not orderbook_range and CONFIG["DEBUG"]:
+        log(f"Warning: Failed to calculate order book range for {trading_pair}")
+    return orderbook_range
+
+
+def calculate_price_impact(levels, target_value, price_impact):
+    """Walk orderbook levels until target_value is absorbed and return the price reached
+       Returns price_impact unchanged if there are no levels"""
+    # Levels arrive as strings and the walk usually stops after a few of them, so parsing
+    # the whole book into arrays for NumPy or Numba costs more than this loop saves
+    value_sum = 0
+    for level in levels:
+        price_impact = float(level[0])  # Price is the first element
+        value_sum += price_impact * float(level[1])  # Size is the second element
+        if value_sum >= target_value:
+            break
+    return price_impact
+
+
 def calculate_orderbook_range(orderbook, target_value):
     """Calculate the price range after absorbing target_value in orderbooks
        Returns a tuple of (buy_price_impact, sell_price_impact, current_price)"""
@@ -143,35 +362,9 @@ def calculate_orderbook_range(orderbook, target_value):
     best_ask = float(asks[0][0]) if asks else float('inf')
     current_price = (best_bid + best_ask) / 2
     
-    # Calculate buy wall
-    buy_value_sum = 0
-    buy_price_impact = best_bid
-    
-    for bid in bids:
-        price = float(bid[0])  # Price is the first element
-        size = float(bid[1])   # Size is the second element
-        value = price * size
-        
-        buy_value_sum += value
-        buy_price_impact = price
-        
-        if buy_value_sum >= target_value:
-            break
-    
-    # Calculate sell wall
-    sell_value_sum = 0
-    sell_price_impact = best_ask
-    
-    for ask in asks:
-        price = float(ask[0])  # Price is the first element
-        size = float(ask[1])   # Size is the second element
-        value = price * size
-        
-        sell_value_sum += value
-        sell_price_impact = price
-        
-        if sell_value_sum >= target_value:
-            break
+    # Calculate buy and sell walls
+    buy_price_impact = calculate_price_impact(bids, target_value, best_bid)
+    sell_price_impact = calculate_price_impact(asks, target_value, best_ask)
     
     # Return tuple of values: (buy_price_impact, sell_price_impact, current_price)
     return (buy_price_impact, sell_price_impact, current_price)
@@ -182,6 +375,11 @@ def format_number(num):
     return f"{num:,.2f}"
 
 
+# Fixed width layouts of scan result and spread alert lines, filled in with keyword arguments
+RESULT_TEMPLATE = "{pair}  {buy:<8}  [{price}]  {sell:<8}  24Hr Vol: ${volume:,}".format
+ALERT_TEMPLATE = "{pair}  {buy:>8}  {price:^15}  {sell:<8}  24Hr Vol: ${volume:,}".format
+
+
 def get_products():
     """Fetch all product information from Coinbase Exchange API with rate limiting"""
     url = "https://api.exchange.coinbase.com/products"
@@ -190,29 +388,29 @@ def get_products():
 
 def ensure_products_file():
     """Ensure the products file exists and is up-to-date"""
-    products_file = os.path.join(SCRIPT_DIR, CONFIG["PRODUCTS_FILE"])
+    products_file = CONFIG["PRODUCTS_FILE"]
     pairs_file = CONFIG["PAIRS_FILE"]
     max_age_hours = CONFIG["PRODUCTS_MAX_AGE"]
     current_datetime = datetime.datetime.now()
     
     # Check products file status
-    products_file_exists = os.path.isfile(products_file)
+    products_file_exists = products_file.is_file()
     products_file_outdated = True
     
     if products_file_exists:
         # Check products file age
-        products_file_timestamp = os.path.getmtime(products_file)
+        products_file_timestamp = products_file.stat().st_mtime
         products_file_datetime = datetime.datetime.fromtimestamp(products_file_timestamp)
         products_age_hours = (current_datetime - products_file_datetime).total_seconds() / 3600
         products_file_outdated = products_age_hours > max_age_hours
     
     # Check pairs file status
-    pairs_file_exists = os.path.isfile(pairs_file)
+    pairs_file_exists = pairs_file.is_file()
     pairs_file_outdated = True
     
     if pairs_file_exists:
         # Check pairs file age
-        pairs_file_timestamp = os.path.getmtime(pairs_file)
+        pairs_file_timestamp = pairs_file.stat().st_mtime
         pairs_file_datetime = datetime.datetime.fromtimestamp(pairs_file_timestamp)
         pairs_age_hours = (current_datetime - pairs_file_datetime).total_seconds() / 3600
         pairs_file_outdated = pairs_age_hours > max_age_hours
@@ -224,8 +422,8 @@ def ensure_products_file():
         
         if products:
             # Save to file
-            with open(products_file, 'w') as f:
-                json.dump(products, f, indent=2)
+            with open(products_file, 'wb') as f:
+                f.write(orjson.dumps(products, option=orjson.OPT_INDENT_2))
             log(f"Products file saved with {len(products)} products")
             
             # Also update pairs file
@@ -238,8 +436,8 @@ def ensure_products_file():
     # Case 2: Only pairs file needs updating
     elif not pairs_file_exists or pairs_file_outdated:
         try:
-            with open(products_file, 'r') as f:
-                products = json.load(f)
+            with open(products_file, 'rb') as f:
+                products = orjson.loads(f.read())
             log(f"Loaded {len(products)} products from existing file")
             
             # Update the pairs file since it's outdated
@@ -253,8 +451,8 @@ def ensure_products_file():
     # Case 3: Both files are up-to-date
     else:
         try:
-            with open(products_file, 'r') as f:
-                products = json.load(f)
+            with open(products_file, 'rb') as f:
+                products = orjson.loads(f.read())
             log(f"Loaded {len(products)} products from existing file")
             return products
         except Exception as e:
@@ -262,6 +460,15 @@ def ensure_products_file():
             return None
 
 
+def write_file_atomically(path, data):
+    """Write bytes to a file through a temporary file that is swapped in when complete
+       An interrupted save therefore never leaves a truncated file behind"""
+    temp_file_path = f"{path}.tmp"
+    with open(temp_file_path, 'wb') as file:
+        file.write(data)
+    os.replace(temp_file_path, path)
+
+
 def generate_active_pairs_file(products, pairs_file_path):
     """Generate or update the active_pairs_no_usd.txt file with current active USD pairs"""
     if not products:
@@ -271,8 +478,8 @@ def generate_active_pairs_file(products, pairs_file_path):
     # Filter out only USD pairs that are not disabled
     usd_pairs = [p for p in products if p.get('quote_currency') == 'USD' and not p.get('trading_disabled')]
 
-    # Extract base currencies and sort them
-    current_active_pairs_no_usd = sorted(p.get('base_currency') for p in usd_pairs if 'base_currency' in p)
+    # Extract base currencies
+    current_active_pairs_no_usd = {p.get('base_currency') for p in usd_pairs if 'base_currency' in p}
     
     if not current_active_pairs_no_usd:
         log(f"No active USD pairs found to write to {pairs_file_path}")
@@ -280,7 +487,7 @@ def generate_active_pairs_file(products, pairs_file_path):
 
     # Load previous pairs from file if it exists
     previous_active_pairs_no_usd = set()
-    if os.path.isfile(pairs_file_path):
+    if pairs_file_path.is_file():
         try:
             with open(pairs_file_path, "r") as file:
                 previous_active_pairs_no_usd = set(file.read().splitlines())
@@ -290,11 +497,10 @@ def generate_active_pairs_file(products, pairs_file_path):
         log(f"{pairs_file_path} not found, creating a new one.")
 
     # Only write to the file if there are changes
-    if set(current_active_pairs_no_usd) != previous_active_pairs_no_usd:
+    if current_active_pairs_no_usd != previous_active_pairs_no_usd:
         try:
-            with open(pairs_file_path, "w") as file:
-                for pair in current_active_pairs_no_usd:
-                    file.write(pair + "\n")
+            # Write the pairs sorted, one per line
+            write_file_atomically(pairs_file_path, ("\n".join(sorted(current_active_pairs_no_usd)) + "\n").encode())
             log(f"{pairs_file_path} has been updated with {len(current_active_pairs_no_usd)} active USD pairs.")
         except Exception as e:
             log(f"Error writing to {pairs_file_path}: {e}")
@@ -304,35 +510,70 @@ def generate_active_pairs_file(products, pairs_file_path):
     return None
 
 
-def get_product_info(product_id, products_data=None):
-    """Get information about a specific product from the products data"""
-    if not products_data:
-        products_file = os.path.join(SCRIPT_DIR, CONFIG["PRODUCTS_FILE"])
-        if os.path.isfile(products_file):
-            try:
-                with open(products_file, 'r') as f:
-                    products_data = json.load(f)
-            except Exception as e:
-                log(f"Error loading products file: {e}")
-                return None
-        else:
-            return None
+def get_price_decimals(product):
+    """Get the decimal precision for displaying prices of a product from its quote_increment
+       Expects quote_increment as a string, index_products normalizes it"""
+    if not product or "quote_increment" not in product:
+        return CONFIG["DEFAULT_PRECISION"]
     
-    # Find the product in the data
-    for product in products_data:
-        if product.get("id") == product_id:
-            return product
-    
-    return None
+    # Parse the quote increment to determine decimal precision, the digits after the point
+    return len(product["quote_increment"].partition(".")[2])
+
+
+def index_products(products):
+    """Build a dict of products by id, precomputing the price decimals and price format of each product"""
+    products_by_id = {}
+    for product in products:
+        # The API sends quote_increment as a string, normalize it once in case a products file holds a number
+        if "quote_increment" in product:
+            product["quote_increment"] = str(product["quote_increment"])
+        product["_decimals"] = get_price_decimals(product)
+        product["_price_format"] = get_precision_formatter(product["_decimals"])
+        products_by_id[product.get("id")] = product
+    return products_by_id
+
+
+def build_pair_metadata_cache(trading_pairs, products_by_id):
+    """Build a dict of the static display data of each trading pair, which never changes between scans
+       Each entry is a (decimals, price_format, padded_pair, display_pair) tuple, decimals is None for unknown products"""
+    default_price_format = get_precision_formatter(CONFIG["DEFAULT_PRECISION"])
+    pair_meta = {}
+    for trading_pair in trading_pairs:
+        product_info = products_by_id.get(trading_pair) if products_by_id else None
+        display_pair = trading_pair.split("-")[0]  # Remove -USD from the trading pair
+        pair_meta[trading_pair] = (
+            product_info["_decimals"] if product_info else None,
+            product_info["_price_format"] if product_info else default_price_format,
+            display_pair.ljust(7),
+            display_pair
+        )
+    return pair_meta
+
+
+@dataclass(slots=True)
+class ActivePair:
+    """A trading pair whose spread exceeded the alert threshold, with the prices and volume of its last scan"""
+    id: str
+    current_price: float
+    buy_price: float
+    sell_price: float
+    buy_price_pct: float
+    sell_price_pct: float
+    spread_pct: float
+    usd_volume: float
+    timestamp: str
 
 
 def save_active_spread_pairs(spread_pairs_data):
-    """Save active spread pairs with book information to a JSON file"""
+    """Save active spread pairs with book information to a JSON file
+       orjson serializes each ActivePair dataclass directly as a JSON object"""
     spread_pairs_file = CONFIG["SPREAD_PAIRS_FILE"]
     
     try:
-        with open(spread_pairs_file, 'w') as file:
-            json.dump(spread_pairs_data, file, indent=2)
+        write_file_atomically(
+            spread_pairs_file,
+            orjson.dumps(spread_pairs_data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+        )
         if CONFIG["DEBUG"]:
             log(f"Saved {len(spread_pairs_data)} active spread pairs to {spread_pairs_file}")
         return True
@@ -347,9 +588,9 @@ def load_active_spread_pairs():
     spread_pairs = []
     
     try:
-        if os.path.exists(spread_pairs_file):
-            with open(spread_pairs_file, 'r') as file:
-                spread_pairs = json.load(file)
+        if spread_pairs_file.exists():
+            with open(spread_pairs_file, 'rb') as file:
+                spread_pairs = [ActivePair(**pair) for pair in orjson.loads(file.read())]
             if CONFIG["DEBUG"]:
                 log(f"Loaded {len(spread_pairs)} active spread pairs from existing file")
         else:
@@ -363,24 +604,88 @@ def load_active_spread_pairs():
     return spread_pairs
 
 
+# Columns of the scan results CSV file
+SCAN_RESULTS_FIELDS = [
+    "timestamp", "id", "current_price", "buy_price", "sell_price",
+    "buy_price_pct", "sell_price_pct", "spread_pct", "usd_volume"
+]
+
+def append_scan_results(rows):
+    """Append scan result rows to the scan results CSV file, writing the header if the file is new"""
+    scan_results_file = CONFIG["SCAN_RESULTS_FILE"]
+    
+    try:
+        write_header = not scan_results_file.is_file() or scan_results_file.stat().st_size == 0
+        with open(scan_results_file, 'a', newline='') as file:
+            writer = csv.writer(file)
+            if write_header:
+                writer.writerow(SCAN_RESULTS_FIELDS)
+            writer.writerows(rows)
+        if CONFIG["DEBUG"]:
+            log(f"Appended {len(rows)} scan results to {scan_results_file}")
+        return True
+    except Exception as e:
+        log(f"Error saving scan results: {e}")
+        return False
+
+
+def save_volume_cache(volume_cache):
+    """Save the last known USD volume of each pair to a JSON file"""
+    volume_cache_file = CONFIG["VOLUME_CACHE_FILE"]
+    
+    try:
+        write_file_atomically(volume_cache_file, orjson.dumps(volume_cache))
+        if CONFIG["DEBUG"]:
+            log(f"Saved volume data for {len(volume_cache)} pairs to {volume_cache_file}")
+        return True
+    except Exception as e:
+        log(f"Error saving volume cache: {e}")
+        return False
+
+
+def load_volume_cache():
+    """Load the last known USD volume of each pair from the JSON file"""
+    volume_cache_file = CONFIG["VOLUME_CACHE_FILE"]
+    volume_cache = {}
+    
+    try:
+        if volume_cache_file.exists():
+            with open(volume_cache_file, 'rb') as file:
+                volume_cache = orjson.loads(file.read())
+            if CONFIG["DEBUG"]:
+                log(f"Loaded volume data for {len(volume_cache)} pairs from existing file")
+    except Exception as e:
+        log(f"Error loading volume cache: {e}")
+        volume_cache = {}
+    
+    return volume_cache
+
+
+# Trading pairs loaded by load_trading_pairs, reloaded only when the pairs file changes
+_PAIRS_CACHE = {"mtime": None, "pairs": []}  # mtime is None until the file has been read
+
 def load_trading_pairs():
     """Load trading pairs from the specified file and ensure they have -USD suffix"""
     pairs_file_path = CONFIG["PAIRS_FILE"]
     trading_pairs = []
 
     try:
-        if os.path.exists(pairs_file_path):
-            with open(pairs_file_path, 'r') as file:
-                lines = file.readlines()
-                for line in lines:
-                    pair = line.strip()
-                    if not pair or pair.startswith('#'):
-                        continue  # Skip empty lines and comments
-                        
-                    # Check if pair already has -USD suffix
-                    if not pair.upper().endswith("-USD"):
-                        pair = f"{pair.upper()}-USD"
-                    trading_pairs.append(pair)
+        if pairs_file_path.exists():
+            pairs_file_mtime = pairs_file_path.stat().st_mtime
+            if pairs_file_mtime != _PAIRS_CACHE["mtime"]:
+                with open(pairs_file_path, 'r') as file:
+                    lines = file.readlines()
+                    for line in lines:
+                        pair = line.strip()
+                        if not pair or pair.startswith('#'):
+                            continue  # Skip empty lines and comments
+                            
+                        # Check if pair already has -USD suffix
+                        if not pair.upper().endswith("-USD"):
+                            pair = f"{pair.upper()}-USD"
+                        trading_pairs.append(pair)
+                _PAIRS_CACHE.update(mtime=pairs_file_mtime, pairs=trading_pairs)
+            trading_pairs = list(_PAIRS_CACHE["pairs"])  # Copy so callers cannot change the cached list
             log(f"Loaded {len(trading_pairs)} products from existing file")
         else:
             log(f"Pairs file not found at {pairs_file_path}. Will create when needed.")
@@ -391,14 +696,42 @@ def load_trading_pairs():
     return trading_pairs
 
 
-def scan_active_spread_pairs(products_data=None, active_spread_pairs_data=None):
+# Errors raised while reading a malformed API response, a pair that raises one is skipped for the scan
+DATA_ERRORS = (KeyError, IndexError, TypeError, ValueError, ZeroDivisionError)
+
+
+@contextmanager
+def scan_executor():
+    """Thread pool for the API requests of one scan, waits for all requests when the scan completes
+       If the scan is interrupted (e.g. Ctrl+C) the queued requests are cancelled instead of sent"""
+    executor = ThreadPoolExecutor(max_workers=CONFIG["SCAN_WORKERS"])
+    try:
+        yield executor
+        executor.shutdown(wait=True)
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+def get_remaining_wait(scan_start, scan_wait):
+    """Get the seconds left until scan_wait seconds have passed since scan_start (a time.monotonic() value)
+       Scans then start every scan_wait seconds no matter how long each scan takes"""
+    return max(0.0, scan_wait - (time.monotonic() - scan_start))
+
+
+def scan_active_spread_pairs(products_by_id=None, active_spread_pairs_data=None, pair_meta=None):
     """Scan active spread pairs that were previously identified with significant spreads"""
     if not active_spread_pairs_data or len(active_spread_pairs_data) == 0:
         log("No active spread pairs to scan!")
         return active_spread_pairs_data
     
+    scan_start = time.monotonic()
+    
     # Make a copy to avoid modifying the original while iterating
     updated_spread_pairs = []
+    result_lines = []
+    scan_results = []
+    record_results = bool(CONFIG["SCAN_RESULTS_FILE"])
     
     log(f"Scanning {len(active_spread_pairs_data)} active spread pairs...")
     
@@ -409,21 +742,37 @@ def scan_active_spread_pairs(products_data=None, active_spread_pairs_data=None):
     scan_wait = CONFIG["SCAN_ACTIVE_SPREADS_PAIRS_WAIT"]
     show_all = CONFIG["SHOW_SCAN_RESULTS"]
     show_below = CONFIG["SHOW_BELOW_THRESHOLD"]
+    debug = CONFIG["DEBUG"]
     
-    # Add a small rate limit delay between API calls (in seconds)
-    api_rate_limit_delay = 0.5
+    # Add the display data of pairs that are not in the metadata cache yet
+    if pair_meta is None:
+        pair_meta = {}
+    new_pairs = [pair_data.id for pair_data in active_spread_pairs_data if pair_data.id not in pair_meta]
+    if new_pairs:
+        pair_meta.update(build_pair_metadata_cache(new_pairs, products_by_id))
+    
+    # Every pair updated in this scan shares the same timestamp
+    scan_timestamp = datetime.datetime.now().isoformat()
     
     valid_pairs = 0
     skipped_pairs = 0
     
+    # Fetch the orderbooks and volume data of all active pairs concurrently, paced by the shared token bucket
+    with scan_executor() as executor:
+        orderbook_futures = {
+            pair_data.id: executor.submit(get_orderbook, pair_data.id)
+            for pair_data in active_spread_pairs_data
+        }
+        volume_futures = {
+            pair_data.id: executor.submit(get_cached_product_volume, pair_data.id)
+            for pair_data in active_spread_pairs_data
+        }
+    
     for pair_data in active_spread_pairs_data:
-        trading_pair = pair_data["id"]
+        trading_pair = pair_data.id
         try:
-            # Add a small delay between API calls to avoid rate limiting
-            time.sleep(api_rate_limit_delay)
-            
             # Get the orderbook for this trading pair
-            orderbook = get_orderbook(trading_pair)
+            orderbook = orderbook_futures[trading_pair].result()
             if not orderbook:
                 log(f"Warning: Failed to get orderbook for {trading_pair}, keeping it in active pairs")
                 updated_spread_pairs.append(pair_data)  # Keep the pair in the active list
@@ -445,227 +794,196 @@ def scan_active_spread_pairs(products_data=None, active_spread_pairs_data=None):
             sell_price_pct = ((sell_price - current_price) / current_price) * 100
             spread_pct = buy_price_pct + sell_price_pct
             
-            # Get product info for precision formatting
-            if products_data:
-                product_info = get_product_info(trading_pair, products_data)
-                if product_info and "quote_increment" in product_info:
-                    quote_increment = product_info["quote_increment"]
-                    # Parse the quote increment to determine decimal precision
-                    if "." in str(quote_increment):
-                        decimals = len(str(quote_increment).split(".")[1])
-                    else:
-                        decimals = 0
-                else:
-                    decimals = CONFIG["DEFAULT_PRECISION"]
-            else:
-                decimals = CONFIG["DEFAULT_PRECISION"]
-                
-            # Get formatted prices with correct decimal precision
-            buy_price_str = format_with_precision(buy_price, decimals)
-            sell_price_str = format_with_precision(sell_price, decimals)
-            current_price_str = format_with_precision(current_price, decimals)
-            
-            # Add another small delay before volume API call
-            time.sleep(api_rate_limit_delay)
+            # Get the precomputed price format and padded display name of the pair
+            _, price_format, padded_pair, _ = pair_meta[trading_pair]
             
             # Get volume data and use the previous stored volume if the API call fails
-            volume_data = get_product_volume(trading_pair)
-            if not volume_data and 'usd_volume' in pair_data:
+            volume_data = volume_futures[trading_pair].result()
+            if not volume_data:
                 # Use previously stored volume data if API call fails
-                usd_volume = pair_data['usd_volume']
+                usd_volume = pair_data.usd_volume
                 valid_pairs += 1
-                if CONFIG["DEBUG"]:
+                if debug:
                     log(f"Using previously stored volume for {trading_pair}: ${usd_volume:,.2f}")
-            elif volume_data:
+            else:
                 # Use 24-hour volume from the API
                 usd_volume = float(volume_data.get("volume_24h", 0))
                 valid_pairs += 1
                 
                 # Check if volume is significantly different from previously stored volume
                 # This helps detect extreme anomalies in the API response
-                if 'usd_volume' in pair_data and usd_volume > 0 and pair_data['usd_volume'] > 0:
-                    volume_change_ratio = usd_volume / pair_data['usd_volume']
+                if usd_volume > 0 and pair_data.usd_volume > 0:
+                    volume_change_ratio = usd_volume / pair_data.usd_volume
                     # Only warn if the change is truly extreme (100x) and for volumes above a meaningful threshold
                     # This avoids unnecessary warnings for normal market fluctuations
                     min_volume_for_warning = 100000  # Only warn for volumes above $100K
                     if ((volume_change_ratio > 100 or volume_change_ratio < 0.01) and 
-                            (usd_volume > min_volume_for_warning or pair_data['usd_volume'] > min_volume_for_warning)):
-                        log(f"Warning: Volume for {trading_pair} changed dramatically: ${pair_data['usd_volume']:,.2f} → ${usd_volume:,.2f} ({volume_change_ratio:.2f}x)")
-            else:
-                log(f"Warning: No volume data for {trading_pair}, keeping it in active pairs")
-                updated_spread_pairs.append(pair_data)  # Keep the pair in the active list
-                skipped_pairs += 1
-                continue
+                            (usd_volume > min_volume_for_warning or pair_data.usd_volume > min_volume_for_warning)):
+                        log(f"Warning: Volume for {trading_pair} changed dramatically: ${pair_data.usd_volume:,.2f} → ${usd_volume:,.2f} ({volume_change_ratio:.2f}x)")
             
-            # Add the updated data to our list
-            updated_pair_data = {
-                "id": trading_pair,
-                "current_price": current_price,
-                "buy_price": buy_price,
-                "sell_price": sell_price,
-                "buy_price_pct": buy_price_pct,
-                "sell_price_pct": sell_price_pct,
-                "spread_pct": spread_pct,
-                "usd_volume": usd_volume,
-                "timestamp": datetime.datetime.now().isoformat()
-            }
-            updated_spread_pairs.append(updated_pair_data)
-            
-            # Format display strings
-            pair_symbol = trading_pair.split("-")[0]
-            padded_pair = pair_symbol.ljust(7)
+        except DATA_ERRORS as e:
+            log(f"Error processing {trading_pair}: {e}")
+            # Keep the pair in the list even if there was an error
+            updated_spread_pairs.append(pair_data)
+            continue
+        
+        # Add the updated data to our list
+        updated_pair_data = ActivePair(
+            trading_pair, current_price, buy_price, sell_price,
+            buy_price_pct, sell_price_pct, spread_pct, usd_volume, scan_timestamp
+        )
+        updated_spread_pairs.append(updated_pair_data)
+        if record_results:
+            scan_results.append([getattr(updated_pair_data, field) for field in SCAN_RESULTS_FIELDS])
+        
+        # Show either all scan results or only spread alerts, formatting the line only if it is shown
+        if show_all:
+            show_line = usd_volume >= min_volume or show_below
+        else:
+            show_line = spread_pct > spread_alert
+        if show_line:
+            # Format each column with fixed width for alignment
             buy_pct_str = f"-{format_number(buy_price_pct)}%"
             sell_pct_str = f"{'+' if sell_price_pct > 0 else ''}{format_number(sell_price_pct)}%"
-            volume_str = f"24Hr Vol: ${int(usd_volume):,}"
-            
-            # Display based on configuration
+            price_str = price_format(current_price)
             if show_all:
-                if usd_volume >= min_volume or show_below:
-                    # Apply fixed width formatting
-                    result_string = (
-                        f"{padded_pair}  "
-                        f"{buy_pct_str:<8}  "
-                        f"[{current_price_str}]  "
-                        f"{sell_pct_str:<8}  "
-                        f"{volume_str}"
-                    )
-                    
-                    # Add (below threshold) label if needed
-                    if usd_volume < min_volume:
-                        result_string += " (below threshold)"
-                        
-                    log(result_string)
-            
-            # Check for spread alert
-            if spread_pct > spread_alert and not show_all:
-                # Only show this format if we're not already showing detailed output
-                buy_pct_str = f"-{format_number(buy_price_pct)}%"
-                current_price_str = f"[{format_with_precision(current_price, decimals)}]"
-                sell_pct_str = f"{'+' if sell_price_pct > 0 else ''}{format_number(sell_price_pct)}%"
-                volume_str = f"24Hr Vol: ${int(usd_volume):,}"
-                
-                # Apply fixed-width formatting for alert message
-                alert_string = (
-                    f"{padded_pair}  "
-                    f"{buy_pct_str:>8}  "
-                    f"{current_price_str:^15}  "
-                    f"{sell_pct_str:<8}  "
-                    f"{volume_str}"
+                line = RESULT_TEMPLATE(
+                    pair=padded_pair, buy=buy_pct_str, price=price_str,
+                    sell=sell_pct_str, volume=int(usd_volume)
                 )
-                
-                if usd_volume < min_volume:
-                    alert_string += " (below threshold)"
-                log(alert_string)
-                    
-        except Exception as e:
-            log(f"Error processing {trading_pair}: {e}")
-            # Keep the pair in the list even if there was an error
-            updated_spread_pairs.append(pair_data)
+            else:
+                line = ALERT_TEMPLATE(
+                    pair=padded_pair, buy=buy_pct_str, price=f"[{price_str}]",
+                    sell=sell_pct_str, volume=int(usd_volume)
+                )
+            
+            # Add (below threshold) label if needed
+            if usd_volume < min_volume:
+                line += " (below threshold)"
+            result_lines.append(line)
+    
+    # Output the results of this scan together, one record per line so each line gets its own timestamp
+    for line in result_lines:
+        log(line)
+    if scan_results:
+        append_scan_results(scan_results)
     
     # Check if we still have active pairs that exceed the spread threshold
-    active_pairs_with_spread = [p for p in updated_spread_pairs if p.get('spread_pct', 0) > spread_alert]
+    active_pairs_with_spread = [p for p in updated_spread_pairs if p.spread_pct > spread_alert]
     pairs_below_threshold = len(updated_spread_pairs) - len(active_pairs_with_spread)
     
     log(f"Completed active spread pairs scan with {valid_pairs}/{len(active_spread_pairs_data)} valid pairs, {skipped_pairs} skipped.")
     if pairs_below_threshold > 0:
         log(f"{pairs_below_threshold} pairs now below spread threshold but kept for continued monitoring.")
-    log(f"Waiting {scan_wait} seconds before next scan...")
+    remaining_wait = get_remaining_wait(scan_start, scan_wait)
+    log(f"Waiting {round(remaining_wait)} seconds before next scan...")
+    flush_logs()
     
-    time.sleep(scan_wait)
+    time.sleep(remaining_wait)
     
     # Return all updated pairs including those that may have fallen below threshold
     # They'll be filtered out during the next full scan if still below threshold
     return updated_spread_pairs
 
 
-def scan_orderbooks(products_data=None):
+def scan_orderbooks(products_by_id=None, pair_meta=None):
     """Main function to scan orderbooks for multiple trading pairs
        Returns a list of active spread pairs that exceed the spread threshold"""
+    scan_start = time.monotonic()
     orderbook_value = CONFIG["ORDERBOOK_VALUE"]
     min_volume = CONFIG["MIN_24HR_VOLUME"]
     spread_alert = CONFIG["SPREAD_ALERT"]
     show_results = CONFIG["SHOW_SCAN_RESULTS"]
     show_below = CONFIG["SHOW_BELOW_THRESHOLD"]
     scan_wait = CONFIG["SCAN_BOOKS_WAIT"]
+    debug = CONFIG["DEBUG"]
     trading_pairs = load_trading_pairs()
     if not trading_pairs:
         log("No trading pairs to scan!")
         return []
     
+    # Add the display data of pairs that are not in the metadata cache yet, e.g. after the pairs file changed
+    if pair_meta is None:
+        pair_meta = {}
+    new_pairs = [trading_pair for trading_pair in trading_pairs if trading_pair not in pair_meta]
+    if new_pairs:
+        pair_meta.update(build_pair_metadata_cache(new_pairs, products_by_id))
+    
     log(f"Scanning {len(trading_pairs)} trading pairs...")
     
-    # List to collect pairs with significant spreads
+    # List to collect pairs with significant spreads, all sharing the timestamp of this scan
     active_spread_pairs = []
+    result_lines = []
+    scan_results = []
+    record_results = bool(CONFIG["SCAN_RESULTS_FILE"])
+    scan_timestamp = datetime.datetime.now().isoformat()
     valid_pairs = 0
     skipped_pairs = 0
     
-    # Add a small rate limit delay between API calls (in seconds)
-    api_rate_limit_delay = 0.5
+    include_below = show_results and show_below
     
+    # Skip pairs whose last known volume was far below the minimum volume, saving their API requests
+    filter_by_volume = min_volume > 0 and not include_below
+    volume_cache = load_volume_cache() if filter_by_volume else {}
+    volume_cache_max_age = CONFIG["VOLUME_CACHE_MAX_AGE"] * 3600
+    now = time.time()
+    pairs_to_fetch = []
     for trading_pair in trading_pairs:
+        cached = volume_cache.get(trading_pair)
+        if cached and now - cached["ts"] < volume_cache_max_age and cached["usd_volume"] < min_volume * 0.5:
+            continue
+        pairs_to_fetch.append(trading_pair)
+    
+    # Fetch volume data and orderbook ranges concurrently, all requests are paced by the shared token bucket
+    # and the results are processed in pair order below
+    with scan_executor() as executor:
+        volume_futures = {
+            trading_pair: executor.submit(fetch_pair_volume, trading_pair)
+            for trading_pair in pairs_to_fetch
+        }
+        if filter_by_volume:
+            # Only fetch orderbooks for pairs that pass the volume filter
+            range_futures = {}
+            for trading_pair, volume_future in volume_futures.items():
+                if volume_future.exception() is None:
+                    usd_volume = volume_future.result()[1]
+                    if usd_volume is not None and usd_volume >= min_volume:
+                        range_futures[trading_pair] = executor.submit(fetch_orderbook_range, trading_pair, orderbook_value)
+        else:
+            # Every orderbook is needed, so fetch them alongside the volume data
+            range_futures = {
+                trading_pair: executor.submit(fetch_orderbook_range, trading_pair, orderbook_value)
+                for trading_pair in pairs_to_fetch
+            }
+    
+    for trading_pair in pairs_to_fetch:
         try:
-            # First check if the trading pair has sufficient volume
-            # Add small delay before volume API call
-            time.sleep(api_rate_limit_delay)
-            
             # Get the 24hr volume in USD
-            volume_data = get_product_volume(trading_pair)
+            volume_data, usd_volume = volume_futures[trading_pair].result()
             if not volume_data:
-                if CONFIG["DEBUG"]:
+                if debug:
                     log(f"Warning: Failed to get volume data for {trading_pair}")
                 skipped_pairs += 1
                 continue
-                
-            # Get volume and price data for calculating USD volume
-            spot_volume = 0
-            last_price = 0
             
-            # Extract volume data
-            if 'volume_24h' in volume_data:
-                spot_volume = float(volume_data['volume_24h'])
-            elif 'volume' in volume_data:
-                spot_volume = float(volume_data['volume'])
-            elif 'spot_volume_24h' in volume_data:
-                spot_volume = float(volume_data['spot_volume_24h'])
-            else:
-                log(f"Could not find volume data in response for {trading_pair}")
-                continue
-            
-            # Extract price data
-            if 'last' in volume_data:
-                last_price = float(volume_data['last'])
-            else:
-                log(f"Could not find price data in response for {trading_pair}")
+            # Skip if volume or price data was missing from the response
+            if usd_volume is None:
                 continue
             
-            # Calculate USD volume as volume * price
-            usd_volume = spot_volume * last_price
+            if filter_by_volume:
+                volume_cache[trading_pair] = {"usd_volume": usd_volume, "ts": now}
             
             # Skip if below threshold and not showing below threshold results
-            if usd_volume < min_volume and not (CONFIG["SHOW_SCAN_RESULTS"] and CONFIG["SHOW_BELOW_THRESHOLD"]):
+            if usd_volume < min_volume and not include_below:
                 continue
             
             # Only count pairs above threshold as valid
             if usd_volume >= min_volume:
                 valid_pairs += 1
             
-            # Now fetch the orderbook data
-            # Add small delay to avoid rate limits
-            time.sleep(api_rate_limit_delay)
-            
-            # Get the orderbook for this trading pair
-            orderbook = get_orderbook(trading_pair)
-            if not orderbook:
-                if CONFIG["DEBUG"]:
-                    log(f"Warning: Failed to get orderbook for {trading_pair}")
-                skipped_pairs += 1
-                continue
-            
-            # Calculate price range after absorbing target order value
-            result = calculate_orderbook_range(orderbook, orderbook_value)
+            # Get the price range after absorbing target order value, skip if it could not be calculated
+            result = range_futures[trading_pair].result()
             if not result:
-                if CONFIG["DEBUG"]:
-                    log(f"Warning: Failed to calculate order book range for {trading_pair}")
                 skipped_pairs += 1
                 continue
             
@@ -676,90 +994,66 @@ def scan_orderbooks(products_data=None):
             sell_price_pct = ((sell_price - current_price) / current_price) * 100
             spread_pct = buy_price_pct + sell_price_pct
             
-            # Get product info for precision formatting
-            if products_data:
-                product_info = get_product_info(trading_pair, products_data)
-                if product_info and "quote_increment" in product_info:
-                    quote_increment = product_info["quote_increment"]
-                    # Parse the quote increment to determine decimal precision
-                    if "." in str(quote_increment):
-                        decimals = len(str(quote_increment).split(".")[1])
-                    else:
-                        decimals = 0
-                else:
-                    decimals = CONFIG["DEFAULT_PRECISION"]
-            else:
-                decimals = CONFIG["DEFAULT_PRECISION"]
-            
-            # Format trading pair (remove -USD if present)
-            display_pair = trading_pair.split("-")[0]
-            padded_pair = display_pair.ljust(7)
-            
-            # Check if this pair has a significant spread and should be actively monitored
-            if spread_pct > spread_alert and usd_volume >= min_volume:
-                # Add to active spread pairs
-                active_spread_pairs.append({
-                    "id": trading_pair,
-                    "current_price": current_price,
-                    "buy_price": buy_price,
-                    "sell_price": sell_price,
-                    "buy_price_pct": buy_price_pct,
-                    "sell_price_pct": sell_price_pct,
-                    "spread_pct": spread_pct,
-                    "usd_volume": usd_volume,
-                    "timestamp": datetime.datetime.now().isoformat()
-                })
-            
-            # Output results if SHOW_SCAN_RESULTS is True
+        except DATA_ERRORS as e:
+            log(f"Error processing {trading_pair}: {e}")
+            continue
+        
+        # Get the precomputed price format and padded display name of the pair
+        _, price_format, padded_pair, _ = pair_meta[trading_pair]
+        
+        if record_results:
+            scan_results.append([
+                scan_timestamp, trading_pair, current_price, buy_price, sell_price,
+                buy_price_pct, sell_price_pct, spread_pct, usd_volume
+            ])
+        
+        # Check if this pair has a significant spread and should be actively monitored
+        if spread_pct > spread_alert and usd_volume >= min_volume:
+            # Add to active spread pairs
+            active_spread_pairs.append(ActivePair(
+                trading_pair, current_price, buy_price, sell_price,
+                buy_price_pct, sell_price_pct, spread_pct, usd_volume, scan_timestamp
+            ))
+        
+        # Show either all scan results or only spread alerts, formatting the line only if it is shown
+        if show_results:
+            show_line = usd_volume >= min_volume or show_below
+        else:
+            show_line = spread_pct > spread_alert
+        if show_line:
+            # Format each column with fixed width for alignment
+            buy_pct_str = f"-{format_number(buy_price_pct)}%"
+            sell_pct_str = f"{'+' if sell_price_pct > 0 else '-'}{format_number(sell_price_pct)}%"
+            price_str = price_format(current_price)
             if show_results:
-                if usd_volume >= min_volume or show_below:
-                    # Format each column with fixed width for alignment
-                    buy_pct_str = f"-{format_number(buy_price_pct)}%"
-                    current_price_str = format_with_precision(current_price, decimals)
-                    sell_pct_str = f"{'+' if sell_price_pct > 0 else '-'}{format_number(sell_price_pct)}%"
-                    volume_str = f"24Hr Vol: ${int(usd_volume):,}"
-                    
-                    # Apply fixed width formatting
-                    result_string = (
-                        f"{padded_pair}  "
-                        f"{buy_pct_str:<8}  "
-                        f"[{current_price_str}]  "
-                        f"{sell_pct_str:<8}  "
-                        f"{volume_str}"
-                    )
-                    
-                    # Add (below threshold) label if needed
-                    if usd_volume < min_volume:
-                        result_string += " (below threshold)"
-                        
-                    log(result_string)
-            
-            # Check for spread alert
-            if spread_pct > spread_alert and not show_results:
-                # Only show this format if we're not already showing detailed output
-                buy_pct_str = f"-{format_number(buy_price_pct)}%"
-                current_price_str = f"[{format_with_precision(current_price, decimals)}]"
-                sell_pct_str = f"{'+' if sell_price_pct > 0 else '-'}{format_number(sell_price_pct)}%"
-                volume_str = f"24Hr Vol: ${int(usd_volume):,}"
-                
-                # Apply fixed-width formatting for alert message
-                alert_string = (
-                    f"{padded_pair}  "
-                    f"{buy_pct_str:>8}  "
-                    f"{current_price_str:^15}  "
-                    f"{sell_pct_str:<8}  "
-                    f"{volume_str}"
+                line = RESULT_TEMPLATE(
+                    pair=padded_pair, buy=buy_pct_str, price=price_str,
+                    sell=sell_pct_str, volume=int(usd_volume)
                 )
-                
-                if usd_volume < min_volume:
-                    alert_string += " (below threshold)"
-                log(alert_string)
-                
-        except Exception as e:
-            log(f"Error processing {trading_pair}: {e}")
+            else:
+                line = ALERT_TEMPLATE(
+                    pair=padded_pair, buy=buy_pct_str, price=f"[{price_str}]",
+                    sell=sell_pct_str, volume=int(usd_volume)
+                )
+            
+            # Add (below threshold) label if needed
+            if usd_volume < min_volume:
+                line += " (below threshold)"
+            result_lines.append(line)
+    
+    # Output the results of this scan together, one record per line so each line gets its own timestamp
+    for line in result_lines:
+        log(line)
     
-    log(f"Completed scan cycle with {valid_pairs}/{len(trading_pairs)} valid pairs, {skipped_pairs} skipped due to API issues. Waiting {scan_wait} seconds before next scan...")
-    time.sleep(scan_wait)
+    if scan_results:
+        append_scan_results(scan_results)
+    if filter_by_volume:
+        save_volume_cache(volume_cache)
+    
+    remaining_wait = get_remaining_wait(scan_start, scan_wait)
+    log(f"Completed scan cycle with {valid_pairs}/{len(trading_pairs)} valid pairs, {skipped_pairs} skipped due to API issues. Waiting {round(remaining_wait)} seconds before next scan...")
+    flush_logs()
+    time.sleep(remaining_wait)
     
     # Save the active spread pairs to file
     if active_spread_pairs:
@@ -791,10 +1085,12 @@ def main():
         log(f"Products data ready with {len(products_data)} products")
     else:
         log("WARNING: Could not load products data!")
+    products_by_id = index_products(products_data) if products_data else {}
     log("==========================")
     
-    # Load trading pairs
+    # Load trading pairs and precompute the display data of each pair once
     trading_pairs = load_trading_pairs()
+    pair_meta = build_pair_metadata_cache(trading_pairs or [], products_by_id)
     
     # Display loaded pairs info if enabled
     if CONFIG["SHOW_LOADED_PAIR_INFO"]:
@@ -805,10 +1101,8 @@ def main():
         if trading_pairs:
             log("Loaded Trading Pairs:")
             for pair in trading_pairs:
-                product_info = get_product_info(pair, products_data)
-                if product_info:
-                    quote_increment = product_info.get("quote_increment")
-                    decimals = len(str(quote_increment).split('.')[1]) if '.' in str(quote_increment) else 0
+                decimals = pair_meta[pair][0]
+                if decimals is not None:
                     log(f"- {pair} (Decimals: {decimals})")
                 else:
                     log(f"- {pair}")
@@ -824,19 +1118,19 @@ def main():
     # Main scan loop
     try:
         log("Starting scan loop. Press Ctrl+C to exit.")
+        flush_logs()
         
         # If SCAN_ONCE is True, we'll only do one full scan
         if CONFIG["SCAN_ONCE"]:
             log("SCAN_ONCE mode: Performing a single full scan")
-            active_spread_pairs = scan_orderbooks(products_data)
+            active_spread_pairs = scan_orderbooks(products_by_id, pair_meta)
             
             # Log the active spread pairs that were found
             if active_spread_pairs:
-                active_symbols = [pair['id'].split('-')[0] for pair in active_spread_pairs]
+                active_symbols = [pair_meta[pair.id][3] for pair in active_spread_pairs]
                 log(f"Found active spread pairs: {', '.join(active_symbols)}")
                 
-                # Save the active spread pairs before exiting
-                save_active_spread_pairs(active_spread_pairs)
+                # The full scan has already saved the active spread pairs
                 log(f"Saved {len(active_spread_pairs)} active spread pairs to {CONFIG['SPREAD_PAIRS_FILE']}")
             log("SCAN_ONCE mode: Scan complete, exiting")
             
@@ -847,29 +1141,34 @@ def main():
                 if active_scan_count == 0 or active_scan_count >= active_scan_cycles or not active_spread_pairs:
                     log(f"Performing full scan of all trading pairs (cycle {active_scan_count}/{active_scan_cycles})")
                     # Perform full scan and get updated active spread pairs
-                    active_spread_pairs = scan_orderbooks(products_data)
+                    active_spread_pairs = scan_orderbooks(products_by_id, pair_meta)
                     # Reset the counter after a full scan
                     active_scan_count = 1  # Set to 1 since we've completed one cycle already
 
                     # Log the active spread pairs that were found
                     if active_spread_pairs:
-                        active_symbols = [pair['id'].split('-')[0] for pair in active_spread_pairs]
+                        active_symbols = [pair_meta[pair.id][3] for pair in active_spread_pairs]
                         log(f"Found active spread pairs: {', '.join(active_symbols)}")
                 else:
                     # Perform scan of active spread pairs only
                     log(f"Scanning only active spread pairs (cycle {active_scan_count}/{active_scan_cycles})")
-                    active_spread_pairs = scan_active_spread_pairs(products_data, active_spread_pairs)
+                    active_spread_pairs = scan_active_spread_pairs(products_by_id, active_spread_pairs, pair_meta)
                     
                     # Increment the count of active spread pair scans
                     active_scan_count += 1
                 
+                # Write out the logs made after the scan's wait, e.g. the active spread pairs found,
+                # instead of leaving them buffered until the next scan completes
+                flush_logs()
+                
                 # No sleep needed here as both scan functions have their own wait time
     except KeyboardInterrupt:
-        print("\nExiting...")
+        log("\nExiting...")
         # Save the active spread pairs before exiting
         if active_spread_pairs:
             save_active_spread_pairs(active_spread_pairs)
-            print(f"Saved {len(active_spread_pairs)} active spread pairs to {CONFIG['SPREAD_PAIRS_FILE']}")
+            log(f"Saved {len(active_spread_pairs)} active spread pairs to {CONFIG['SPREAD_PAIRS_FILE']}")
+        flush_logs()
 
 
 